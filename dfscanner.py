@@ -9,9 +9,11 @@ def main():
     parser.add_argument("-scan", action="store_true", help="Escanear valores con regex")
     parser.add_argument("-apply_regex", action="store_true", help="Aplicar regex a columnas")
     parser.add_argument("-report", action="store_true", help="Mostrar reporte de cambios")
+    parser.add_argument("-workers", type=int, default=None, help="Procesos para el escaneo (default: núcleos disponibles)")
+    parser.add_argument("-verbose", action="store_true", help="Mostrar barras de progreso")
     args = parser.parse_args()
 
-    scanner = DFScanner(args.file)
+    scanner = DFScanner(args.file, workers=args.workers, verbose=args.verbose)
 
     if args.scan:
         found = scanner.scan_values()
@@ -1,42 +1,188 @@
 import dask.dataframe as dd
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
+import functools
 import yaml
+from contextlib import nullcontext
 from tqdm import tqdm
+from tqdm.dask import TqdmCallback
 from colorama import init, Fore, Style
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import re2  # google-re2: matching en tiempo lineal, sin backtracking
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+CHUNK_SIZE = 200_000
+STRING_DTYPE = "string[pyarrow]"
+
+
+# RE2 difiere de `re` en estas construcciones: \w \d \s \b (y sus negaciones)
+# son sólo ASCII y `$` no acepta un "\n" final. Con texto en español eso haría
+# perder coincidencias, así que esos patrones se quedan en `re`.
+_RE2_INCOMPATIBLE = re.compile(r"\\[wdsbWDSB]|\$")
+
+# Hyperscan ancla \A, \Z y \z al inicio/fin del buffer, no de cada celda: sobre
+# las celdas unidas perdería coincidencias, así que si algún patrón los usa se
+# busca celda a celda.
+_BUFFER_ANCHORS = re.compile(r"\\[AZz]")
+
+
+def _compile(pattern_src: str):
+    if re2 is not None and not _RE2_INCOMPATIBLE.search(pattern_src):
+        options = re2.Options()
+        options.log_errors = False  # un patrón no soportado cae a `re` sin ruido
+        try:
+            return re2.compile(pattern_src, options)
+        except re2.error:
+            pass
+    return re.compile(pattern_src)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_matcher(pattern_srcs: tuple):
+    # Se construye una vez por proceso: los patrones no cambian entre chunks
+    combined = _compile("|".join(f"(?:{p})" for p in pattern_srcs))
+
+    def cells_match(cells: list) -> bool:
+        return any(combined.search(v) for v in cells)
+
+    if hyperscan is None or any(_BUFFER_ANCHORS.search(p) for p in pattern_srcs):
+        return cells_match
+
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[p.encode() for p in pattern_srcs],
+            # UTF8|UCP: clases y "." por carácter Unicode, como `re`. PREFILTER:
+            # lo no soportado se aproxima por exceso en vez de fallar; los
+            # falsos positivos se descartan al confirmar con cells_match.
+            flags=[
+                hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8
+                | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_PREFILTER
+            ] * len(pattern_srcs),
+        )
+    except hyperscan.error:
+        return cells_match
+
+    def blob_match(cells: list) -> bool:
+        # Un solo scan sobre todas las celdas unidas por "\n" como prefiltro;
+        # una coincidencia podría cruzar celdas, así que se confirma por celda.
+        found = []
+
+        def on_match(*_):
+            found.append(True)
+            return True
+
+        try:
+            db.scan("\n".join(cells).encode(), match_event_handler=on_match)
+        except hyperscan.error:
+            if not found:
+                raise
+        return bool(found) and cells_match(cells)
+
+    return blob_match
+
+
+def _scan_chunk(chunk: pd.DataFrame, pattern_srcs: tuple) -> bool:
+    matches = _build_matcher(pattern_srcs)
+    return any(matches(chunk[c].dropna().tolist()) for c in chunk.columns)
+
+
+@functools.lru_cache(maxsize=None)
+def _arrow_regex_ok(pattern_src: str) -> bool:
+    # Con string[pyarrow], str.contains usa el kernel RE2 de Arrow. Sólo vale
+    # si RE2 acepta el patrón (sin lookaround, backrefs, \Z, (?x)...) y lo
+    # evalúa igual que `re` (ver _RE2_INCOMPATIBLE). Un array vacío no compila
+    # la regex, por eso se prueba sobre [""].
+    if _RE2_INCOMPATIBLE.search(pattern_src):
+        return False
+    try:
+        pc.match_substring_regex(pa.array([""], pa.string()), pattern_src)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return False
+    return True
+
+
+def _scan_partition(df: pd.DataFrame, pattern_srcs: tuple) -> pd.DataFrame:
+    # Una fila por partición; una columna booleana por (columna, patrón).
+    # Los patrones que Arrow no puede evaluar igual que `re` van por object.
+    row = []
+    for column in df.columns:
+        series = df[column]
+        as_object = None
+        for p in pattern_srcs:
+            found = None
+            if _arrow_regex_ok(p):
+                try:
+                    found = series.str.contains(p, na=False).any()
+                except Exception:
+                    found = None  # se reintenta con `re`, no se pierde el patrón
+            if found is None:
+                if as_object is None:
+                    as_object = series.astype(object)
+                found = as_object.str.contains(p, na=False).any()
+            row.append(bool(found))
+    return pd.DataFrame([row], columns=range(len(row)))
 
 
 class DFScanner:
-    def __init__(self, csv_path: str, config_path: str = "config.yml"):
+    def __init__(self, csv_path: str, config_path: str = "config.yml", workers: int = None,
+                 verbose: bool = False):
         init(autoreset=True)
-        self.df = dd.read_csv(csv_path, dtype=str)
+        self.csv_path = csv_path
+        self.workers = workers
+        self.verbose = verbose
+        # Cadenas en buffers Arrow contiguos: str.contains usa kernels vectorizados
+        self.df = dd.read_csv(csv_path, dtype=STRING_DTYPE)
         self.patterns = self.load_patterns(config_path)
         self.regex_counters = {}
         self.report = []
 
     def load_patterns(self, path: str) -> list:
         with open(path, "r") as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=SafeLoader)
         return [re.compile(p) for p in config.get("regex_patterns", [])]
 
     def apply_regex_to_columns(self):
         print(Fore.BLUE + "\n[+] Iniciando análisis por columnas...\n" + Style.RESET_ALL)
         start_time = time.time()
 
-        for column in tqdm(self.df.columns, desc="Escaneando columnas"):
-            for pattern in self.patterns:
-                try:
-                    if isinstance(pattern, str):
-                        regex = re.compile(pattern, flags=re.IGNORECASE)
-                    else:
-                        regex = pattern
+        # Una sola pasada por partición: cada partición se lee una vez y se
+        # evalúan ahí todas las combinaciones (columna, patrón).
+        pattern_srcs = tuple(p.pattern for p in self.patterns)
+        keys = [(column, p) for column in self.df.columns for p in pattern_srcs]
+        meta = pd.DataFrame({i: pd.Series(dtype=bool) for i in range(len(keys))})
 
-                    match = self.df[column].astype(str).str.contains(regex, regex=True, na=False)
-                    if match.any().compute():
-                        self.report[column].append(pattern)
-                except Exception as e:
-                    print(Fore.RED + f"[-] Error procesando columna '{column}': {e}" + Style.RESET_ALL)
+        # Progreso a nivel de grafo, sólo si se pide: nada por fila ni por columna
+        progress = TqdmCallback(desc="Escaneando columnas") if self.verbose else nullcontext()
+        try:
+            with progress:
+                found = self.df.map_partitions(_scan_partition, pattern_srcs, meta=meta).any().compute()
+            results = dict(zip(keys, found.tolist()))
+        except Exception as e:
+            print(Fore.RED + f"[-] Error calculando coincidencias: {e}" + Style.RESET_ALL)
+            results = {}
+
+        for (column, pattern), found in results.items():
+            if found:
+                self.regex_counters[column] = self.regex_counters.get(column, 0) + 1
+                self.report.append({"columna": column, "patron": pattern})
 
         duration = time.time() - start_time
         print(Fore.GREEN + f"\n[✓] Análisis completado en {duration:.2f} segundos.\n" + Style.RESET_ALL)
@@ -45,23 +191,35 @@ class DFScanner:
         print(Fore.BLUE + "\n[+] Iniciando escaneo de valores del DataFrame...\n")
         start_time = time.time()
 
-        def row_matches(row, patterns):
-            for val in row:
-                for pattern in patterns:
-                    if pattern.search(str(val)):
-                        return True
+        if not self.patterns:
             return False
 
+        pattern_srcs = tuple(p.pattern for p in self.patterns)
         found_any = False
-        # Iterar partición por partición con tqdm para mostrar progreso real
-        for partition in tqdm(self.df.partitions, desc="Escaneando particiones"):
-            result = partition.map_partitions(
-                lambda df: df.apply(row_matches, axis=1, args=(self.patterns,))
-            ).compute()
-
-            if result.any():
-                found_any = True
-                break
+
+        # pandas por chunks + procesos: sin grafo de tareas ni scheduler de Dask
+        workers = self.workers or os.cpu_count() or 1
+        max_pending = workers * 2
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = set()
+        try:
+            reader = pd.read_csv(self.csv_path, chunksize=CHUNK_SIZE, dtype=STRING_DTYPE)
+            for chunk in tqdm(reader, desc="Escaneando chunks", unit="chunk", disable=not self.verbose):
+                pending.add(executor.submit(_scan_chunk, chunk, pattern_srcs))
+                # Revisar sin bloquear los chunks ya terminados: una coincidencia
+                # temprana corta la lectura del CSV sin esperar a llenar la cola.
+                timeout = None if len(pending) >= max_pending else 0
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if any(f.result() for f in done):
+                    found_any = True
+                    break
+
+            while pending and not found_any:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                found_any = any(f.result() for f in done)
+        finally:
+            # Con coincidencia no se espera a los chunks que aún corren
+            executor.shutdown(wait=not found_any, cancel_futures=True)
 
         elapsed = time.time() - start_time
         print(Fore.GREEN + f"\n[✓] Escaneo terminado en {elapsed:.2f} segundos")
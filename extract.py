@@ -1,19 +1,40 @@
 import sys
 import os
-import csv
 import logging
 import argparse
+import queue
+import threading
 import yaml
-from typing import List, Optional, Dict, Any
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Deque, Union
 from datetime import datetime
 from elasticsearch import Elasticsearch
-from elasticsearch.exceptions import ConnectionError, AuthenticationException, TransportError
+from elasticsearch.exceptions import ConnectionError, AuthenticationException, TransportError, SerializationError
+from elasticsearch.serializer import JSONSerializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed parser
+except ImportError:
+    from yaml import SafeLoader
 
 # === Load YAML config ===
+@lru_cache(maxsize=None)
+def read_config_file(path: str = "config.yml") -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=SafeLoader)
+
 def load_config(env: str = "dev") -> Dict[str, Any]:
     try:
-        with open("config.yml", "r") as f:
-            config = yaml.safe_load(f)
+        config = read_config_file("config.yml")
         if env not in config:
             logging.error(f"Environment '{env}' not found in config.yml")
             sys.exit(1)
@@ -25,6 +46,35 @@ def load_config(env: str = "dev") -> Dict[str, Any]:
         logging.error(f"Error parsing config.yml: {e}")
         sys.exit(1)
 
+# === JSON (de)serialization ===
+class OrjsonSerializer(JSONSerializer):
+    # Same contract as the stock serializer, backed by orjson's C parser
+    def loads(self, data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(f"Unable to deserialize as JSON: {data!r}", errors=(e,))
+
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, str):
+            return data.encode("utf-8", "surrogatepass")
+        if isinstance(data, bytes):
+            return data
+        try:
+            return orjson.dumps(data, default=self.default)
+        except (TypeError, orjson.JSONEncodeError) as e:
+            raise SerializationError(f"Unable to serialize to JSON: {data!r}", errors=(e,))
+
+def get_serializers() -> Dict[str, JSONSerializer]:
+    # Empty when orjson is missing: the client then keeps its own serializers
+    if orjson is None:
+        return {}
+    serializer = OrjsonSerializer()
+    return {
+        "application/json": serializer,
+        "application/vnd.elasticsearch+json": serializer,
+    }
+
 # === Logging config ===
 logging.basicConfig(
     level=logging.INFO,
@@ -63,17 +113,23 @@ def open_point_in_time(es: Elasticsearch, index: str, keep_alive: str = "1m") ->
         logging.error(f"Error opening PIT: {e}")
         sys.exit(1)
 
-def build_query(
-    pit_id: str,
-    search_after: Optional[List[Any]],
-    level: Optional[str],
+def build_filter_query(
+    level: Optional[Union[str, List[str]]],
     start_date: Optional[str],
-    end_date: Optional[str],
-    batch_size: int
+    end_date: Optional[str]
 ) -> Dict[str, Any]:
     filters = []
-    if level:
-        filters.append({"match": {"level": level}})
+    levels = [level] if isinstance(level, str) else list(level or [])
+    if len(levels) == 1:
+        filters.append({"match": {"level": levels[0]}})
+    elif levels:
+        # Several levels in one request instead of one search (or msearch entry) each
+        filters.append({
+            "bool": {
+                "should": [{"match": {"level": lvl}} for lvl in levels],
+                "minimum_should_match": 1
+            }
+        })
     if start_date or end_date:
         date_range = {}
         if start_date:
@@ -81,86 +137,261 @@ def build_query(
         if end_date:
             date_range["lte"] = end_date
         filters.append({"range": {"timestamp": date_range}})
+    return {
+        "bool": {
+            "must": filters if filters else {"match_all": {}}
+        }
+    }
+
+# Shared by every page; never mutated
+SORT_CLAUSE = [{"timestamp": "asc"}]
+
+def build_query_template(
+    pit_id: str,
+    filter_query: Dict[str, Any],
+    batch_size: int,
+    fields: Optional[List[str]] = None,
+    slice_id: int = 0,
+    max_slices: int = 1
+) -> Dict[str, Any]:
+    # Static part of every page request; only "search_after" changes per page
     query_body = {
         "size": batch_size,
-        "sort": [{"timestamp": "asc"}],
+        "track_total_hits": False,
+        "sort": SORT_CLAUSE,
         "pit": {"id": pit_id, "keep_alive": "1m"},
-        "query": {
-            "bool": {
-                "must": filters if filters else {"match_all": {}}
-            }
-        }
+        "query": filter_query
     }
-    if search_after:
-        query_body["search_after"] = search_after
+    if fields:
+        query_body["_source"] = {"includes": fields}
+    if max_slices > 1:
+        query_body["slice"] = {"id": slice_id, "max": max_slices}
     return query_body
 
-def save_logs_to_csv(logs: List[Dict[str, Any]], chunk_index: int, output_dir: str) -> None:
+DEFAULT_FIELDS = ["timestamp", "level", "message"]
+MAX_PENDING_WRITES = 2
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB: far fewer write() syscalls per chunk
+
+def discover_fieldnames(logs: List[Dict[str, Any]]) -> List[str]:
+    # Sorted so the column order is the same in every file and every run
+    return sorted(set().union(*(log.keys() for log in logs)))
+
+def save_logs_to_csv(
+    logs: List[Dict[str, Any]],
+    chunk_index: int,
+    output_dir: str,
+    fieldnames: Optional[List[str]] = None
+) -> None:
     output_file = os.path.join(output_dir, f"logs_chunk_{chunk_index}.csv")
-    all_keys = set().union(*(log.keys() for log in logs))
+    if fieldnames is None:
+        fieldnames = discover_fieldnames(logs)
 
     try:
-        with open(output_file, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=list(all_keys))
-            writer.writeheader()
-            for log in logs:
-                writer.writerow(log)
+        # One string column per field, encoded by Arrow's C++ CSV writer
+        # instead of a per-row Python loop. Missing keys become empty cells.
+        with open(output_file, mode="wb", buffering=WRITE_BUFFER_SIZE) as file:
+            if fieldnames:
+                columns = {
+                    key: [None if log.get(key) is None else str(log[key]) for log in logs]
+                    for key in fieldnames
+                }
+                pa_csv.write_csv(pa.table(columns), file)
         logging.info(f"✅ Saved {len(logs)} logs to: {output_file}")
     except OSError as e:
         logging.error(f"❌ Error writing to file '{output_file}': {e}")
+        raise
     except Exception as e:
         logging.error(f"❌ Unexpected error while saving logs to CSV: {e}")
+        raise
+
+class CsvChunkWriter:
+    # Rolls logs over into logs_chunk_<n>.csv files of max_logs_per_chunk rows.
+    # Files are encoded on a small thread pool so disk I/O overlaps the next
+    # search; at most MAX_PENDING_WRITES full chunks are held in memory.
+
+    def __init__(
+        self,
+        output_dir: str,
+        max_logs_per_chunk: int,
+        fieldnames: Optional[List[str]] = None
+    ) -> None:
+        self.output_dir = output_dir
+        self.max_logs_per_chunk = max_logs_per_chunk
+        self.fieldnames = fieldnames
+        self.total_logs = 0
+        self._chunk_counter = 1
+        # Pre-sized buffer: one allocation per chunk instead of repeated list growth
+        self._buffer: List[Optional[Dict[str, Any]]] = [None] * max_logs_per_chunk
+        self._idx = 0
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="csv-writer")
+        self._pending: Deque[Future] = deque()
+        self._closed = False
+
+    def write(self, logs: Iterable[Dict[str, Any]]) -> None:
+        if not isinstance(logs, list):
+            logs = list(logs)
+        size = self.max_logs_per_chunk
+        start = 0
+        # Copy whole runs into the pre-sized buffer with slice assignment
+        # instead of one store per log.
+        while start < len(logs):
+            take = min(size - self._idx, len(logs) - start)
+            self._buffer[self._idx:self._idx + take] = logs[start:start + take]
+            self._idx += take
+            start += take
+            if self._idx == size:
+                self.total_logs += size
+                self._flush(self._buffer)
+                self._buffer = [None] * size
+                self._idx = 0
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._idx:
+                self.total_logs += self._idx
+                self._flush(self._buffer[:self._idx])
+                self._idx = 0
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def _flush(self, logs: List[Dict[str, Any]]) -> None:
+        # The schema is fixed per index: resolve it once, from the first chunk
+        if self.fieldnames is None:
+            self.fieldnames = discover_fieldnames(logs)
+        if len(self._pending) >= MAX_PENDING_WRITES:
+            self._pending.popleft().result()
+        self._pending.append(self._pool.submit(
+            save_logs_to_csv, logs, self._chunk_counter, self.output_dir, self.fieldnames
+        ))
+        self._chunk_counter += 1
+
+# Only the sources and sort cursors are read back; ES drops the rest
+# (took, _shards, _index, _id, _score...) before serializing the response.
+SEARCH_FILTER_PATH = ["hits.hits._source", "hits.hits.sort"]
+
+def extract_sources(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # ES already projects _source to the requested fields and the CSV writers
+    # read missing keys as empty, so sources are passed through untouched.
+    return [hit.get("_source", {}) for hit in hits]
+
+def search_pages(
+    es: Elasticsearch,
+    pit_id: str,
+    filter_query: Dict[str, Any],
+    batch_size: int,
+    fields: Optional[List[str]] = None,
+    slice_id: int = 0,
+    max_slices: int = 1
+) -> Iterator[List[Dict[str, Any]]]:
+    query = build_query_template(pit_id, filter_query, batch_size, fields, slice_id, max_slices)
+
+    def fetch_page(search_after: Optional[List[Any]]) -> List[Dict[str, Any]]:
+        # Pages are fetched one at a time, so the template is safe to mutate
+        if search_after:
+            query["search_after"] = search_after
+        response = es.search(body=query, filter_path=SEARCH_FILTER_PATH)
+        return response.get("hits", {}).get("hits", [])
+
+    # Page N+1 is requested as soon as page N's cursor is known, so its
+    # round-trip overlaps with the caller processing page N.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="es-prefetch") as prefetcher:
+        next_page = prefetcher.submit(fetch_page, None)
+        while True:
+            hits = next_page.result()
+
+            if not hits:
+                return
+
+            next_page = prefetcher.submit(fetch_page, hits[-1]["sort"])
+            yield hits
+
+def iter_hit_pages(
+    es: Elasticsearch,
+    pit_id: str,
+    filter_query: Dict[str, Any],
+    batch_size: int,
+    fields: Optional[List[str]] = None,
+    slices: int = 1
+) -> Iterator[List[Dict[str, Any]]]:
+    # With slices > 1 each PIT slice is paged in its own thread; pages arrive in
+    # completion order, so output is only sorted by timestamp within a slice.
+    if slices <= 1:
+        yield from search_pages(es, pit_id, filter_query, batch_size, fields)
+        return
+
+    pages: queue.Queue = queue.Queue(maxsize=slices * 2)
+    stop = threading.Event()
+    done_marker = object()
+
+    def put(item: Any) -> None:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def run_slice(slice_id: int) -> None:
+        try:
+            for hits in search_pages(es, pit_id, filter_query, batch_size, fields, slice_id, slices):
+                if stop.is_set():
+                    return
+                put(hits)
+        finally:
+            put(done_marker)
+
+    with ThreadPoolExecutor(max_workers=slices) as executor:
+        futures = [executor.submit(run_slice, i) for i in range(slices)]
+        try:
+            remaining = slices
+            while remaining:
+                item = pages.get()
+                if item is done_marker:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stop.set()
+    for future in futures:
+        future.result()
 
 def fetch_logs(
     es: Elasticsearch,
     index: str,
-    level: Optional[str],
+    level: Optional[Union[str, List[str]]],
     start_date: Optional[str],
     end_date: Optional[str],
     batch_size: int,
     csv_output_base: str,
     fields: Optional[List[str]] = None,
-    max_logs_per_chunk: int = 1000  # Nuevo parámetro con valor por defecto
+    max_logs_per_chunk: int = 1000,  # Nuevo parámetro con valor por defecto
+    slices: int = 1
 ) -> None:
     validate_index_exists(es, index)
     pit_id = open_point_in_time(es, index)
     output_dir = get_output_directory(csv_output_base, index)
 
-    search_after = None
-    total_logs = 0
-    current_chunk = []
-    chunk_counter = 1
+    writer = CsvChunkWriter(output_dir, max_logs_per_chunk, fields or None)
 
-    try:
-        while True:
-            query = build_query(pit_id, search_after, level, start_date, end_date, batch_size)
-            if fields:
-                query["_source"] = fields
-            response = es.search(body=query)
-            hits = response.get("hits", {}).get("hits", [])
+    # The filter clause is the same for every page: build it once
+    filter_query = build_filter_query(level, start_date, end_date)
 
-            if not hits:
-                break
-
-            for hit in hits:
-                log = hit["_source"]
-                if fields:
-                    log = {k: log.get(k, None) for k in fields}
-                current_chunk.append(log)
-                total_logs += 1
-                if len(current_chunk) >= max_logs_per_chunk:
-                    save_logs_to_csv(current_chunk, chunk_counter, output_dir)
-                    chunk_counter += 1
-                    current_chunk.clear()
-
-            search_after = hits[-1]["sort"]
-
-        if current_chunk:
-            save_logs_to_csv(current_chunk, chunk_counter, output_dir)
-
-        logging.info(f"✅ Total logs extracted: {total_logs}")
+    try:
+        for hits in iter_hit_pages(es, pit_id, filter_query, batch_size, fields, slices):
+            writer.write(extract_sources(hits))
+        writer.close()
+        logging.info(f"✅ Total logs extracted: {writer.total_logs}")
     finally:
-        close_point_in_time_with_retries(es, pit_id)
+        # A failed chunk write makes close() raise; the PIT must be released anyway
+        try:
+            writer.close()
+        finally:
+            close_point_in_time_with_retries(es, pit_id)
 
 def close_point_in_time_with_retries(es: Elasticsearch, pit_id: str, retries: int = 3):
     for attempt in range(1, retries + 1):
@@ -176,26 +407,43 @@ def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Extract logs from Elasticsearch using PIT and save as CSV.")
     parser.add_argument("--env", default="dev", help="Environment (dev, test, prod)")
     parser.add_argument("--index", help="Override index name from config")
-    parser.add_argument("--level", help="Filter by log level (INFO, ERROR, etc.)")
+    parser.add_argument("--level", nargs="+", help="Filter by log level(s) (INFO, ERROR, etc.)")
     parser.add_argument("--start", help="Start date (YYYY-MM-DD or ISO 8601)")
     parser.add_argument("--end", help="End date (YYYY-MM-DD or ISO 8601)")
     parser.add_argument("--batch", type=int, help="Override batch size")
+    parser.add_argument("--fields", nargs="+", help="_source fields to fetch and write (default: timestamp level message)")
+    parser.add_argument("--slices", type=int, help="Parallel PIT slices (default: 1, keeps timestamp order)")
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_arguments()
     config = load_config(args.env)
 
-    try:
-        es = Elasticsearch(config["elasticsearch_url"])
-    except (ConnectionError, AuthenticationException) as e:
-        logging.error(f"❌ Error connecting to Elasticsearch: {e}")
-        sys.exit(1)
-
     index = args.index or config["default_index"]
     batch_size = args.batch or config["batch_size"]
     csv_output_base = config["csv_output_base"]
     max_logs_per_chunk = config.get("max_logs_per_chunk", 1000)
+    slices = args.slices or config.get("slices", 1)
+    fields = args.fields or config.get("fields", DEFAULT_FIELDS)
+    connections_per_node = config.get("connections_per_node", 64)
+
+    # gzip responses and keep one pooled connection per slice worker alive
+    client_options: Dict[str, Any] = {
+        "http_compress": True,
+        "request_timeout": 60,
+        "connections_per_node": max(connections_per_node, slices),
+        "retry_on_timeout": True,
+        "max_retries": 3,
+    }
+    serializers = get_serializers()
+    if serializers:
+        client_options["serializers"] = serializers
+
+    try:
+        es = Elasticsearch(config["elasticsearch_url"], **client_options)
+    except (ConnectionError, AuthenticationException) as e:
+        logging.error(f"❌ Error connecting to Elasticsearch: {e}")
+        sys.exit(1)
 
     fetch_logs(
         es=es,
@@ -205,6 +453,7 @@ if __name__ == "__main__":
         end_date=args.end,
         batch_size=batch_size,
         csv_output_base=csv_output_base,
-        fields=["timestamp", "level", "message"],
-        max_logs_per_chunk=max_logs_per_chunk  # <-- ahora configurable
+        fields=fields,
+        max_logs_per_chunk=max_logs_per_chunk,  # <-- ahora configurable
+        slices=slices
     )
@@ -1,14 +1,23 @@
-import csv
-import random
+import uuid
+from datetime import date
+import numpy as np
+import pandas as pd
 from faker import Faker
 import argparse
 import os
 from math import ceil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import time
 
 fake = Faker()
 
+BUFFER_ESCRITURA = 1 << 20  # 1 MiB: menos llamadas write() por archivo
+FILAS_POR_LOTE = 1000
+TAMANO_POOL = 5000  # valores de Faker pre-generados por proveedor
+
+_pools = {}
+
 # Columnas base
 COLUMNAS = [
     "id", "nombre", "apellido", "email", "telefono", "direccion",
@@ -20,59 +29,101 @@ COLUMNAS = [
     "tipo_cliente", "referido_por", "region"
 ]
 
-def generar_fila():
-    return {
-        "id": fake.uuid4(),
-        "nombre": fake.first_name(),
-        "apellido": fake.last_name(),
-        "email": fake.email(),
-        "telefono": fake.phone_number(),
-        "direccion": fake.street_address(),
-        "ciudad": fake.city(),
-        "estado": fake.state(),
-        "codigo_postal": fake.postcode(),
-        "pais": fake.country(),
-        "empresa": fake.company(),
-        "puesto": fake.job(),
-        "fecha_registro": fake.date_between(start_date='-2y', end_date='today'),
-        "fecha_ultima_compra": fake.date_between(start_date='-1y', end_date='today'),
-        "producto_favorito": fake.word(),
-        "monto_total_compras": round(random.uniform(100, 10000), 2),
-        "frecuencia_compra": random.choice(["Alta", "Media", "Baja"]),
-        "metodo_pago": random.choice(["Tarjeta", "Transferencia", "Efectivo", "PayPal"]),
-        "activo": random.choice([True, False]),
-        "notas": fake.sentence(),
-        "fecha_nacimiento": fake.date_of_birth(minimum_age=18, maximum_age=70),
-        "genero": random.choice(["M", "F", "Otro"]),
-        "nivel_ingresos": random.choice(["Bajo", "Medio", "Alto"]),
-        "nivel_satisfaccion": random.randint(1, 10),
-        "cliente_recurrente": random.choice([True, False]),
-        "nps": random.randint(-100, 100),
-        "descuento": f"{random.randint(0, 50)}%",
-        "tipo_cliente": random.choice(["Nuevo", "Leal", "VIP", "Potencial"]),
-        "referido_por": fake.name(),
-        "region": random.choice(["Norte", "Sur", "Este", "Oeste", "Internacional"])
-    }
-
-def generar_csv_chunks(nombre_base, total_filas, filas_por_chunk):
-    num_chunks = ceil(total_filas / filas_por_chunk)
-    contador_total = 0
+# Opciones fijas de las columnas categóricas
+FRECUENCIAS = ("Alta", "Media", "Baja")
+METODOS_PAGO = ("Tarjeta", "Transferencia", "Efectivo", "PayPal")
+GENEROS = ("M", "F", "Otro")
+NIVELES_INGRESOS = ("Bajo", "Medio", "Alto")
+TIPOS_CLIENTE = ("Nuevo", "Leal", "VIP", "Potencial")
+REGIONES = ("Norte", "Sur", "Este", "Oeste", "Internacional")
 
-    start_time = time.time()
+def _pool(proveedor):
+    # Faker es lento por llamada: se muestrea una vez y luego se indexa
+    if proveedor not in _pools:
+        metodo = getattr(fake, proveedor)
+        _pools[proveedor] = np.array([metodo() for _ in range(TAMANO_POOL)], dtype=object)
+    return _pools[proveedor]
+
+def _muestrear(proveedor, n, rng):
+    return _pool(proveedor)[rng.integers(0, TAMANO_POOL, n)].tolist()
+
+def _fechas_atras(dias_min, dias_max, n, rng):
+    hoy = np.datetime64(date.today(), "D")
+    dias = rng.integers(dias_min, dias_max + 1, n).astype("timedelta64[D]")
+    return (hoy - dias).astype(str).tolist()
 
-    for chunk in range(num_chunks):
-        nombre_archivo = f"{nombre_base}_parte_{chunk+1}.csv"
-        filas_en_este_chunk = min(filas_por_chunk, total_filas - contador_total)
+def _uuids(n):
+    # Una sola lectura de os.urandom para todo el lote en vez de una por uuid4()
+    crudo = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=crudo[i:i + 16], version=4)) for i in range(0, 16 * n, 16)]
 
-        with open(nombre_archivo, mode='w', newline='', encoding='utf-8') as archivo:
-            writer = csv.DictWriter(archivo, fieldnames=COLUMNAS)
-            writer.writeheader()
+def generar_columnas(n, rng):
+    # Un lote generado por columnas (SoA): una llamada numpy o un muestreo
+    # del pool por columna
+    columnas = (
+        _uuids(n),  # id
+        _muestrear("first_name", n, rng),  # nombre
+        _muestrear("last_name", n, rng),  # apellido
+        _muestrear("email", n, rng),  # email
+        _muestrear("phone_number", n, rng),  # telefono
+        _muestrear("street_address", n, rng),  # direccion
+        _muestrear("city", n, rng),  # ciudad
+        _muestrear("state", n, rng),  # estado
+        _muestrear("postcode", n, rng),  # codigo_postal
+        _muestrear("country", n, rng),  # pais
+        _muestrear("company", n, rng),  # empresa
+        _muestrear("job", n, rng),  # puesto
+        _fechas_atras(0, 730, n, rng),  # fecha_registro
+        _fechas_atras(0, 365, n, rng),  # fecha_ultima_compra
+        _muestrear("word", n, rng),  # producto_favorito
+        np.round(rng.uniform(100, 10000, n), 2).tolist(),  # monto_total_compras
+        rng.choice(FRECUENCIAS, n).tolist(),  # frecuencia_compra
+        rng.choice(METODOS_PAGO, n).tolist(),  # metodo_pago
+        (rng.random(n) < 0.5).tolist(),  # activo
+        _muestrear("sentence", n, rng),  # notas
+        _fechas_atras(18 * 365, 71 * 365 - 1, n, rng),  # fecha_nacimiento
+        rng.choice(GENEROS, n).tolist(),  # genero
+        rng.choice(NIVELES_INGRESOS, n).tolist(),  # nivel_ingresos
+        rng.integers(1, 11, n).tolist(),  # nivel_satisfaccion
+        (rng.random(n) < 0.5).tolist(),  # cliente_recurrente
+        rng.integers(-100, 101, n).tolist(),  # nps
+        [f"{d}%" for d in rng.integers(0, 51, n).tolist()],  # descuento
+        rng.choice(TIPOS_CLIENTE, n).tolist(),  # tipo_cliente
+        _muestrear("name", n, rng),  # referido_por
+        rng.choice(REGIONES, n).tolist(),  # region
+    )
+    return dict(zip(COLUMNAS, columnas))
+
+def _escribir_chunk(nombre_archivo, filas, semilla):
+    # Función de nivel de módulo para poder ejecutarse en otro proceso
+    rng = np.random.default_rng(semilla)
+    with open(nombre_archivo, mode='w', newline='', encoding='utf-8', buffering=BUFFER_ESCRITURA) as archivo:
+        # Lotes de FILAS_POR_LOTE: to_csv (implementado en C) escribe cada lote
+        # y la memoria queda acotada aunque el chunk sea grande
+        for inicio in range(0, filas, FILAS_POR_LOTE):
+            lote = generar_columnas(min(FILAS_POR_LOTE, filas - inicio), rng)
+            pd.DataFrame(lote, columns=COLUMNAS).to_csv(archivo, index=False, header=inicio == 0)
+    return nombre_archivo, filas
+
+def generar_csv_chunks(nombre_base, total_filas, filas_por_chunk, workers=None):
+    num_chunks = ceil(total_filas / filas_por_chunk)
+
+    start_time = time.time()
+    # Un flujo aleatorio independiente por chunk, aunque corran en paralelo
+    semillas = np.random.SeedSequence().spawn(num_chunks)
 
-            for _ in tqdm(range(filas_en_este_chunk), desc=f"Generando {nombre_archivo}", unit="fila"):
-                writer.writerow(generar_fila())
-                contador_total += 1
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futuros = []
+        for chunk in range(num_chunks):
+            nombre_archivo = f"{nombre_base}_parte_{chunk+1}.csv"
+            filas_en_este_chunk = min(filas_por_chunk, total_filas - chunk * filas_por_chunk)
+            futuros.append(executor.submit(_escribir_chunk, nombre_archivo, filas_en_este_chunk, semillas[chunk]))
 
-        print(f"✅ {nombre_archivo} generado con {filas_en_este_chunk} filas.")
+        with tqdm(total=total_filas, desc="Generando filas", unit="fila", mininterval=0.5) as pbar:
+            for futuro in as_completed(futuros):
+                nombre_archivo, filas = futuro.result()
+                pbar.update(filas)
+                tqdm.write(f"✅ {nombre_archivo} generado con {filas} filas.")
 
     duracion = time.time() - start_time
     print(f"\n🎉 ¡Listo! {total_filas} filas generadas en {duracion:.2f} segundos.")
@@ -82,6 +133,7 @@ if __name__ == "__main__":
     parser.add_argument("nombre_base", help="Nombre base de los archivos (ej: datos)")
     parser.add_argument("total_filas", type=int, help="Cantidad total de filas a generar")
     parser.add_argument("--chunk", type=int, default=10000, help="Filas por archivo (default: 10000)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (default: núcleos disponibles)")
     args = parser.parse_args()
 
-    generar_csv_chunks(args.nombre_base, args.total_filas, args.chunk)
+    generar_csv_chunks(args.nombre_base, args.total_filas, args.chunk, args.workers)
@@ -1,5 +1,6 @@
 import random
 from datetime import datetime, timedelta
+from itertools import accumulate
 
 # Config
 output_file = "logs/mi_app.log"
@@ -21,12 +22,32 @@ mensajes = [
 # Crear logs
 inicio = datetime(2025, 4, 25, 0, 0, 0)
 
-with open(output_file, "w") as f:
-    for i in range(num_logs):
-        timestamp = inicio + timedelta(seconds=i * random.randint(1, 3))
-        nivel = random.choice(niveles)
-        mensaje = random.choice(mensajes)
-        log_line = f"{timestamp.isoformat()}Z {nivel} {mensaje}\n"
-        f.write(log_line)
+# Todos los valores aleatorios en lote y una sola escritura
+niveles_log = random.choices(niveles, k=num_logs)
+mensajes_log = random.choices(mensajes, k=num_logs)
+segundos = accumulate((random.randint(1, 3) for _ in range(num_logs - 1)), initial=0)
+
+# Timestamps armados con tablas en vez de datetime + isoformat() por línea:
+# la fecha se formatea una vez por día y HH/MM/SS salen de una tabla de 60.
+dos_digitos = [f"{i:02d}" for i in range(60)]
+segundo_inicial = inicio.hour * 3600 + inicio.minute * 60 + inicio.second
+fechas = {}
+
+def formatear_timestamp(offset):
+    dia, resto = divmod(segundo_inicial + offset, 86400)
+    fecha = fechas.get(dia)
+    if fecha is None:
+        fecha = fechas[dia] = (inicio.date() + timedelta(days=dia)).isoformat()
+    hora, resto = divmod(resto, 3600)
+    minuto, segundo = divmod(resto, 60)
+    return f"{fecha}T{dos_digitos[hora]}:{dos_digitos[minuto]}:{dos_digitos[segundo]}Z"
+
+contenido = "".join([
+    f"{formatear_timestamp(s)} {nivel} {mensaje}\n"
+    for s, nivel, mensaje in zip(segundos, niveles_log, mensajes_log)
+])
+
+with open(output_file, "w", buffering=1 << 20) as f:
+    f.write(contenido)
 
 print(f"Generado archivo con {num_logs} líneas en {output_file}")